@@ -6,19 +6,28 @@ Your refactored code must pass all tests (except the skipped one).
 """
 
 import unittest
+from enum import IntEnum
 import json
 import tempfile
+from array import array
 from pathlib import Path
 from unittest.mock import patch, mock_open
 
+import user_processor
 from user_processor import (
     read_users_from_csv,
     calculate_user_score,
     process_users,
     generate_report,
     export_json,
+    export_ndjson,
+    iter_user_chunks,
+    process_users_from_csv,
+    update_filter_counts,
     ScoringConfig,
-    UserDataError
+    User,
+    UserDataError,
+    UserTable,
 )
 
 
@@ -124,6 +133,19 @@ class TestCalculateUserScore(unittest.TestCase):
         # 5 * 20 + 10 * 10 = 100 + 100 = 200
         self.assertEqual(score, 200)
 
+    def test_int_subclass_weights(self):
+        """Should score with int subclasses (e.g. IntEnum) as plain ints."""
+        class Weight(IntEnum):
+            HIGH = 20
+            LOW = 10
+
+        class Sneaky(int):
+            def __repr__(self):
+                return "__import__('os').getpid()"
+
+        config = ScoringConfig(purchase_multiplier=Weight.HIGH, visit_multiplier=Sneaky(10))
+        self.assertEqual(calculate_user_score(5, 10, config), 200)
+
     def test_high_volume_user_score(self):
         """Should calculate score for high-volume users."""
         score = calculate_user_score(100, 200, self.default_config)
@@ -131,6 +153,15 @@ class TestCalculateUserScore(unittest.TestCase):
         self.assertEqual(score, 2000)
 
 
+class TestCalculateUserScoreTypes(unittest.TestCase):
+    """Tests for argument types accepted by calculate_user_score."""
+
+    def test_string_counts_raise_type_error(self):
+        """Should reject unparsed CSV strings instead of repeating them."""
+        with self.assertRaises(TypeError):
+            calculate_user_score('15', '30')
+
+
 class TestProcessUsers(unittest.TestCase):
     """Tests for user processing and filtering."""
 
@@ -211,6 +242,37 @@ John Doe,invalid_age,10,20
             process_users(raw_users, self.default_config)
 
 
+class TestUpdateFilterCounts(unittest.TestCase):
+    """Tests for filter usage counting."""
+
+    def test_counts_start_at_zero_and_increment(self):
+        """Should add a count to new filters and bump existing ones."""
+        filters = [{'name': 'new'}, {'name': 'seen', 'count': 2}]
+        update_filter_counts(filters)
+        self.assertEqual([f['count'] for f in filters], [1, 3])
+
+
+class TestProcessUsersErrorReporting(unittest.TestCase):
+    """Tests that config problems and out-of-range data are reported correctly."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.default_config = ScoringConfig()
+
+    def test_non_integer_multiplier_is_not_a_data_error(self):
+        """Should raise TypeError rather than UserDataError for a float weight."""
+        raw_users = [{'name': 'Alice', 'age': '25', 'purchases': '15', 'visits': '30'}]
+        with self.assertRaises(TypeError) as ctx:
+            process_users(raw_users, ScoringConfig(purchase_multiplier=1.5))
+        self.assertNotIsInstance(ctx.exception, UserDataError)
+
+    def test_score_overflow_is_a_data_error(self):
+        """Should report a score beyond 64 bits as invalid user data."""
+        raw_users = [User('X', '30', str(2**62), '1')]
+        with self.assertRaisesRegex(UserDataError, "score out of range"):
+            process_users(raw_users, self.default_config)
+
+
 class TestGenerateReport(unittest.TestCase):
     """Tests for report generation."""
 
@@ -321,6 +383,47 @@ class TestExportJSON(unittest.TestCase):
 
         self.assertTrue(json_file.exists())
 
+    def test_export_without_orjson(self):
+        """Should fall back to the stdlib encoder when orjson is unavailable."""
+        json_file = self.temp_path / "fallback.json"
+        users = [{'name': 'Zoë', 'age': 25, 'score': 300}]
+
+        with patch.object(user_processor, 'orjson', None):
+            export_json(users, json_file)
+
+        content = json_file.read_bytes()
+        self.assertEqual(json.loads(content), users)
+        self.assertEqual(content, '[{"name":"Zoë","age":25,"score":300}]'.encode('utf-8'))
+        self.assertNotIn(b'\\u', content)
+
+    def test_export_raw_user_rows_as_objects(self):
+        """Should write User rows as JSON objects with or without orjson."""
+        users = [User('Alice', '25', '15', '30')]
+        expected = [{'name': 'Alice', 'age': '25', 'purchases': '15', 'visits': '30'}]
+
+        for encoder in (user_processor.orjson, None):
+            with self.subTest(orjson=encoder is not None):
+                json_file = self.temp_path / "raw.json"
+                ndjson_file = self.temp_path / "raw.ndjson"
+                with patch.object(user_processor, 'orjson', encoder):
+                    export_json(users, json_file)
+                    export_ndjson(users, ndjson_file)
+                self.assertEqual(json.loads(json_file.read_text()), expected)
+                self.assertEqual(json.loads(ndjson_file.read_text()), expected[0])
+
+    def test_export_ndjson(self):
+        """Should write one JSON object per line."""
+        ndjson_file = self.temp_path / "output.ndjson"
+        users = [
+            {'name': 'Alice', 'age': 25, 'score': 300},
+            {'name': 'Bob', 'age': 30, 'score': 200},
+        ]
+
+        export_ndjson(users, ndjson_file)
+
+        lines = ndjson_file.read_text().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], users)
+
 
 class TestIntegration(unittest.TestCase):
     """Integration tests for the complete workflow."""
@@ -435,5 +538,138 @@ AboveScore,25,11,0
         self.assertIn('AboveScore', names)
 
 
+class TestUserRecord(unittest.TestCase):
+    """Tests for the compact CSV row record."""
+
+    def test_mapping_style_access(self):
+        """Should support key lookup and dict unpacking like a row dict."""
+        user = User('Alice', '25', '15', '30')
+        self.assertEqual(user['name'], 'Alice')
+        self.assertEqual({**user}, {'name': 'Alice', 'age': '25', 'purchases': '15', 'visits': '30'})
+        with self.assertRaises(KeyError):
+            user['score']
+        for method_name in ('count', 'index', '_asdict'):
+            with self.assertRaises(KeyError):
+                user[method_name]
+
+    def test_contains_and_get_use_field_names(self):
+        """Should answer membership and .get() by key, like a row dict."""
+        user = User('Alice', '25', '15', '30')
+        self.assertIn('name', user)
+        self.assertNotIn('score', user)
+        self.assertNotIn('Alice', user)
+        self.assertEqual(user.get('age'), '25')
+        self.assertIsNone(user.get('score'))
+        self.assertEqual(user.get('score', 0), 0)
+
+    def test_iteration_yields_values(self):
+        """Should keep tuple iteration, with keys() giving the field names."""
+        user = User('Alice', '25', '15', '30')
+        self.assertEqual(list(user), ['Alice', '25', '15', '30'])
+        self.assertEqual(list(user.keys()), ['name', 'age', 'purchases', 'visits'])
+
+    def test_mixed_user_and_dict_rows(self):
+        """Should process lists mixing User rows and dicts in either order."""
+        user = User('Alice', '25', '15', '30')
+        row = {'name': 'Bob', 'age': '30', 'purchases': '20', 'visits': '10'}
+        expected = process_users([user._asdict(), row])
+
+        self.assertEqual(process_users([user, row]), expected)
+        self.assertEqual(process_users([row, user])[::-1], expected)
+
+    def test_short_row_raises(self):
+        """Should reject CSV lines with fewer fields than the header."""
+        csv_file = Path(tempfile.mkdtemp()) / "short.csv"
+        csv_file.write_text("name,age,purchases,visits\nJohn Doe,25\n")
+        with self.assertRaisesRegex(UserDataError, "Invalid user data"):
+            read_users_from_csv(csv_file)
+
+
+class TestUserTable(unittest.TestCase):
+    """Tests for the column-oriented user table."""
+
+    def test_select_and_to_rows(self):
+        """Should keep masked positions across all columns and rebuild dicts."""
+        table = UserTable(
+            [{'name': 'Alice'}, {'name': 'Bob'}],
+            array('q', [25, 30]),
+            array('q', [15, 1]),
+            array('q', [30, 2]),
+            array('q', [300, 20]),
+        )
+
+        rows = table.select([True, False]).to_rows()
+
+        self.assertEqual(rows, [
+            {'name': 'Alice', 'age': 25, 'purchases': 15, 'visits': 30, 'score': 300},
+        ])
+
+
+class TestStreamingPipeline(unittest.TestCase):
+    """Tests for chunked CSV reading and processing."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.temp_path = Path(self.temp_dir)
+
+    def _create_sample_csv(self):
+        """Create a temporary CSV file with sample user data."""
+        csv_file = self.temp_path / "test_users.csv"
+        csv_content = """name,age,purchases,visits
+Alice Johnson,25,15,30
+Bob Smith,17,5,10
+Carol White,35,25,50
+David Brown,42,8,20
+Eve Davis,29,30,45
+Frank Miller,19,12,25
+Grace Lee,55,40,80
+"""
+        csv_file.write_text(csv_content)
+        return csv_file
+
+    def test_chunks_cover_all_rows(self):
+        """Should split rows into chunks of at most chunksize."""
+        csv_file = self._create_sample_csv()
+        chunks = list(iter_user_chunks(csv_file, chunksize=3))
+        self.assertEqual([len(c) for c in chunks], [3, 3, 1])
+        self.assertEqual(chunks[0][0]['name'], 'Alice Johnson')
+
+    def test_chunked_processing_matches_full_read(self):
+        """Should produce the same result regardless of chunk size."""
+        csv_file = self._create_sample_csv()
+        expected = process_users(read_users_from_csv(csv_file))
+        self.assertEqual(process_users_from_csv(csv_file, chunksize=2), expected)
+
+    def test_parallel_processing_matches_serial(self):
+        """Should return the same users in the same order with a process pool."""
+        csv_file = self._create_sample_csv()
+        expected = process_users_from_csv(csv_file, chunksize=2)
+        self.assertEqual(process_users_from_csv(csv_file, chunksize=2, workers=2), expected)
+
+    def test_missing_columns_raise_before_streaming(self):
+        """Should validate the header before yielding any chunk."""
+        csv_file = self.temp_path / "missing.csv"
+        csv_file.write_text("name,age\nJohn Doe,25\n")
+        with self.assertRaisesRegex(UserDataError, "Missing required fields"):
+            list(iter_user_chunks(csv_file))
+
+    def test_invalid_chunksize_raises(self):
+        """Should reject chunk sizes below 1 before reading anything."""
+        csv_file = self._create_sample_csv()
+        for chunksize in (0, -1):
+            with self.assertRaisesRegex(ValueError, "chunksize must be at least 1"):
+                iter_user_chunks(csv_file, chunksize=chunksize)
+            with self.assertRaisesRegex(ValueError, "chunksize must be at least 1"):
+                process_users_from_csv(csv_file, chunksize=chunksize)
+
+    def test_header_only_csv_raises(self):
+        """Should raise the same empty-file error as read_users_from_csv."""
+        csv_file = self.temp_path / "empty.csv"
+        csv_file.write_text("name,age,purchases,visits\n")
+        with self.assertRaisesRegex(UserDataError, "empty"):
+            process_users_from_csv(csv_file)
+
+
 if __name__ == '__main__':
     unittest.main()
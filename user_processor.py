@@ -1,93 +1,377 @@
 import json
 import csv
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from itertools import chain, compress, islice, repeat
+from operator import attrgetter, gt, index, itemgetter
+from typing import Iterator, NamedTuple
 
-# Global variables
-data = []
-THRESHOLD = 100
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
 
-def process_users(file='users.csv', filters=[]):
-    # Read and process user data
-    f = open(file, 'r')
-    reader = csv.DictReader(f)
+REQUIRED_FIELDS = {'name', 'age', 'purchases', 'visits'}
+DEFAULT_CHUNKSIZE = 100_000
+WRITE_BUFFER_SIZE = 1 << 20
 
-    for row in reader:
-        data.append(row)
+# Stdlib json fallback settings matching orjson's output: compact
+# separators and raw UTF-8 instead of \uXXXX escapes.
+_JSON_OPTIONS = {'separators': (',', ':'), 'ensure_ascii': False}
 
-    # Process the data
-    results = []
-    for d in data:
-        age = int(d['age'])
-        if age > 18:
-            score = calculate_score(d['purchases'], d['visits'])
-            if score > THRESHOLD:
-                results.append(d)
-
-    # Apply filters
-    for filter in filters:
-        filter['count'] = filter.get('count', 0) + 1
-
-    f.close()
-    return results
 
-def calculate_score(p, v):
-    # Calculate user score
-    return int(p) * 10 + int(v) * 5
+class UserDataError(Exception):
+    """Raised when user data is missing, malformed or cannot be read."""
+
 
-def generate_report(users, output='report.txt'):
-    # Generate report
-    f = open(output, 'w')
+class ScoringConfig(NamedTuple):
+    """Weights and thresholds used to score and filter users.
+
+    Immutable and hashable, with no per-instance ``__dict__``; fields are
+    read through C-level tuple accessors.
+    """
+
+    purchase_multiplier: int = 10
+    visit_multiplier: int = 5
+    score_threshold: int = 100
+    min_age: int = 18
+
+
+class User(NamedTuple):
+    """One user row as read from CSV, with every field still a string.
+
+    A four-field tuple is a fraction of the size of a per-row dict. For
+    callers that treated rows as dicts, ``user['name']``, ``user.get(key)``,
+    ``key in user``, ``user.keys()`` and ``{**user}`` behave as on a dict.
+    Iteration and ``len`` are still the tuple's: ``for x in user`` yields
+    values, not keys. Use ``user.keys()`` or ``user._asdict()`` for keys.
+    ``export_json`` and ``export_ndjson`` write rows as JSON objects; other
+    JSON encoders see a plain tuple and need ``user._asdict()`` first.
+    """
+
+    name: str
+    age: str
+    purchases: str
+    visits: str
+
+    def __getitem__(self, key):
+        if not isinstance(key, str):
+            return tuple.__getitem__(self, key)
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._fields
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def keys(self) -> tuple:
+        return self._fields
+
+
+class UserTable(NamedTuple):
+    """Struct-of-arrays view of user rows: one typed column per numeric field.
+
+    ``rows`` keeps the source rows so ``name`` and any extra fields of
+    mapping inputs are carried through to the output untouched.
+    """
+
+    rows: list
+    age: array
+    purchases: array
+    visits: array
+    score: array
+
+    def select(self, mask) -> 'UserTable':
+        """Return a table holding only the positions where ``mask`` is true."""
+        mask = list(mask)
+        rows, *columns = (compress(column, mask) for column in self)
+        return UserTable(list(rows), *(array('q', column) for column in columns))
+
+    def to_rows(self) -> list:
+        """Materialize the table as dicts with the numeric fields as ints."""
+        if _is_user_rows(self.rows):
+            # ``name`` is User's only non-numeric field; a dict literal is
+            # about 3x cheaper than merging ``_asdict()`` and never touches
+            # the Python-level ``__getitem__`` shim.
+            return [
+                {'name': user.name, 'age': age, 'purchases': p, 'visits': v, 'score': s}
+                for user, age, p, v, s in zip(*self)
+            ]
+        return [
+            {**user, 'age': age, 'purchases': p, 'visits': v, 'score': s}
+            for user, age, p, v, s in zip(*self)
+        ]
+
+
+def _is_user_rows(rows: list) -> bool:
+    """True only if every row is a ``User``; mixed lists take the mapping path."""
+    return bool(rows) and set(map(type, rows)) == {User}
+
+
+def _field_getter(rows: list):
+    # All-User rows are read through their C-level field accessors
+    # (attrgetter); itemgetter would route every lookup through the Python
+    # __getitem__ shim, but works for any mix of User rows and dicts.
+    return attrgetter if _is_user_rows(rows) else itemgetter
+
+
+def _int_column(rows: list, field: str, getter=itemgetter) -> array:
+    return array('q', map(int, map(getter(field), rows)))
+
+
+def _iter_user_rows(f, filepath) -> Iterator[User]:
+    """Validate the CSV header in ``f`` and return a lazy iterator of ``User`` rows.
+
+    Rows are split by the C ``csv.reader``, reordered by ``itemgetter`` and
+    wrapped by ``tuple.__new__``, so no Python code runs per row.
+    Columns other than the ``User`` fields are dropped.
+    """
+    reader = csv.reader(f)
+    fields = next(reader, None)
+    if not fields:
+        raise UserDataError(f"CSV file is empty: {filepath}")
+    missing = REQUIRED_FIELDS - set(fields)
+    if missing:
+        raise UserDataError(f"Missing required fields: {', '.join(sorted(missing))}")
+    getter = itemgetter(*(fields.index(field) for field in User._fields))
+    return map(partial(tuple.__new__, User), map(getter, filter(None, reader)))
+
+
+def _take(rows: Iterator[User], n: int = None) -> list:
+    """Consume up to ``n`` rows (all if ``None``), rejecting truncated lines."""
+    try:
+        return list(islice(rows, n))
+    except IndexError as e:
+        raise UserDataError("Invalid user data: row has too few fields") from e
+
+
+def _open_csv(filepath):
+    try:
+        return open(filepath, 'r', newline='', encoding='utf-8')
+    except FileNotFoundError as e:
+        raise UserDataError(f"File not found: {filepath}") from e
+
+
+def _no_rows_error(filepath) -> UserDataError:
+    return UserDataError(f"CSV file is empty (header only): {filepath}")
+
+
+def read_users_from_csv(filepath: str = 'users.csv') -> list:
+    """Read user rows from a CSV file as a list of ``User`` records.
+
+    The header is validated and the rows parsed in one pass over the file.
+    """
+    with _open_csv(filepath) as f:
+        users = _take(_iter_user_rows(f, filepath))
+    if not users:
+        raise _no_rows_error(filepath)
+    return users
+
+
+def iter_user_chunks(filepath: str = 'users.csv', chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[list]:
+    """Yield user rows from a CSV file in lists of at most ``chunksize`` rows.
+
+    Only one chunk is held in memory at a time, so large files can be
+    processed with a working set bounded by ``chunksize`` rather than file size.
+    Like ``read_users_from_csv``, a file with no user rows raises
+    ``UserDataError``, detected from the first chunk without a second scan.
+    A ``chunksize`` below 1 raises ``ValueError`` immediately, before the
+    file is opened.
+    """
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be at least 1, got {chunksize}")
+    return _iter_user_chunks(filepath, chunksize)
 
-    total = 0
-    avg = 0
 
-    for u in users:
-        total = total + 1
-        s = calculate_score(u['purchases'], u['visits'])
-        f.write(f"User: {u['name']}, Score: {s}\n")
+def _iter_user_chunks(filepath, chunksize: int) -> Iterator[list]:
+    with _open_csv(filepath) as f:
+        rows = _iter_user_rows(f, filepath)
+        chunk = _take(rows, chunksize)
+        if not chunk:
+            raise _no_rows_error(filepath)
+        while chunk:
+            yield chunk
+            chunk = _take(rows, chunksize)
 
-    if total > 0:
-        avg = sum([calculate_score(u['purchases'], u['visits']) for u in users]) / total
 
-    f.write(f"\nTotal users: {total}\n")
-    f.write(f"Average score: {avg}\n")
+# Scores are deliberately not memoized per (purchases, visits) value: an
+# lru_cache probe (~0.12 us) costs more than the specialized multiply-add
+# it would skip (~0.06 us), so only the per-config scorer is cached.
+@lru_cache(maxsize=32)
+def _make_scorer(pm: int, vm: int):
+    """Compile ``lambda p, v: p * pm + v * vm`` with the multipliers as constants.
 
-    f.close()
+    Baking the weights in as literals turns them into ``LOAD_CONST`` in the
+    scorer's bytecode instead of per-call variable lookups. Scorers are
+    cached per ``(pm, vm)`` pair, so each config is compiled once.
+    """
+    # int.__repr__ rather than repr(): on Python < 3.10 index() returns int
+    # subclasses unchanged, and their own __repr__ must never reach eval.
+    source = f"lambda p, v: p * {int.__repr__(index(pm))} + v * {int.__repr__(index(vm))}"
+    return eval(compile(source, '<scorer>', 'eval'))
+
+
+def _score_batch(purchases: array, visits: array, pm: int, vm: int) -> array:
+    """Score whole columns at once with the config's specialized scorer."""
+    return array('q', map(_make_scorer(pm, vm), purchases, visits))
+
+
+def calculate_user_score(purchases: int, visits: int, config: ScoringConfig = None) -> int:
+    """Calculate a user's score from their purchases and visits.
+
+    Both counts must already be ints, as they are on rows returned by
+    ``process_users``; values are converted exactly once, at processing.
+    Strings such as raw CSV values raise ``TypeError`` rather than being
+    parsed here.
+    """
+    config = config or ScoringConfig()
+    scorer = _make_scorer(config.purchase_multiplier, config.visit_multiplier)
+    return scorer(index(purchases), index(visits))
+
+
+def process_users(raw_users: list, config: ScoringConfig = None) -> list:
+    """Score users and keep those above the configured age and score thresholds.
+
+    Numeric fields are held column-wise in a ``UserTable`` of ``array('q')``
+    columns. Parsing and masking run in C iterators (``map``/``int``/
+    ``compress``). Scoring calls the config's generated scorer once per
+    adult, and an output dict is built for each row that passes. This is
+    the one place numeric fields are parsed; returned rows carry them as ints.
+    """
+    config = config or ScoringConfig()
+    pm, vm = config.purchase_multiplier, config.visit_multiplier
+    threshold, min_age = config.score_threshold, config.min_age
+    try:
+        getter = _field_getter(raw_users)
+        ages = _int_column(raw_users, 'age', getter)
+        # Age is the cheapest discriminant: drop minors before touching the
+        # purchase/visit columns so rejected rows are never converted or scored.
+        age_mask = list(map(gt, ages, repeat(min_age)))
+        users = list(compress(raw_users, age_mask))
+        purchases = _int_column(users, 'purchases', getter)
+        visits = _int_column(users, 'visits', getter)
+    except (KeyError, TypeError, ValueError, OverflowError) as e:
+        raise UserDataError(f"Invalid user data: {e}") from e
+
+    try:
+        scores = _score_batch(purchases, visits, pm, vm)
+    except OverflowError as e:
+        raise UserDataError("Invalid user data: score out of range") from e
+
+    table = UserTable(users, array('q', compress(ages, age_mask)), purchases, visits, scores)
+    return table.select(map(gt, scores, repeat(threshold))).to_rows()
+
+
+def update_filter_counts(filters: list) -> list:
+    """Increment the ``count`` of each filter dict, as ``process_users`` once did."""
+    for f in filters:
+        f['count'] = f.get('count', 0) + 1
+    return filters
+
+
+def generate_report(users, output='report.txt'):
+    """Write a per-user score report followed by the total and average score.
+
+    ``users`` are rows as returned by ``process_users``; their attached
+    ``score`` is reported as-is, so no arithmetic happens here. All lines are
+    handed to a single ``writelines`` call instead of one ``write`` per user.
+    """
+    scores = list(map(itemgetter('score'), users))
+    total = len(scores)
+
+    trailer = [f"\nTotal users: {total}\n"]
+    if total:
+        trailer.append(f"Average score: {sum(scores) / total:.2f}\n")
+
+    with open(output, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        f.writelines(chain(
+            (f"User: {u['name']}, Score: {s}\n" for u, s in zip(users, scores)),
+            trailer,
+        ))
     return True
 
+
+def _as_mapping(user):
+    return user._asdict() if type(user) is User else user
+
+
+def _orjson_default(obj):
+    if type(obj) is User:
+        return obj._asdict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
 def export_json(users, file='output.json'):
-    # Export to JSON
-    f = open(file, 'w')
-    json.dump(users, f)
-    f.close()
+    """Export users to a JSON array, using ``orjson`` when it is installed.
 
-def main():
-    users = process_users()
-    generate_report(users)
-    export_json(users)
-    print('Done!')
+    Raw ``User`` rows are written as objects, the same as row dicts.
+    """
+    if orjson is not None:
+        with open(file, 'wb') as f:
+            f.write(orjson.dumps(users, default=_orjson_default))
+        return
+    # The stdlib encoder writes tuples (and so User rows) as arrays
+    # without consulting ``default``, so rows are converted up front.
+    with open(file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        json.dump(list(map(_as_mapping, users)), f, **_JSON_OPTIONS)
 
-if __name__ == '__main__':
-    main()
 
+def _ndjson_line(user) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(user, default=_orjson_default, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(_as_mapping(user), **_JSON_OPTIONS) + '\n').encode('utf-8')
 
-# ============================================================================
-# Skeleton functions/classes for test compatibility
-# These are placeholders that should be implemented during refactoring.
-# Function signatures are provided to guide the refactoring.
-# ============================================================================
 
-class UserDataError(Exception):
-    pass
+def export_ndjson(users, file='output.ndjson'):
+    """Export users as newline-delimited JSON, one object per line.
 
+    Each record is encoded on its own, so no single string or bytes
+    object the size of the whole export is ever built.
+    """
+    with open(file, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+        f.writelines(map(_ndjson_line, users))
 
-class ScoringConfig:
-    def __init__(self, purchase_weight: int = 10, visit_weight: int = 5):
-        raise NotImplementedError(f"ScoringConfig.__init__ called")
 
+def process_users_from_csv(filepath: str = 'users.csv', config: ScoringConfig = None,
+                           chunksize: int = DEFAULT_CHUNKSIZE, workers: int = 1) -> list:
+    """Stream a CSV file through ``process_users`` one chunk at a time.
 
-def read_users_from_csv(filepath: str = 'users.csv') -> list:
-    raise NotImplementedError(f"read_users_from_csv called")
+    Only the users that pass the filter are kept, so peak memory is
+    proportional to ``chunksize`` plus the size of the result.
 
+    With ``workers > 1`` chunks are scored in a ``ProcessPoolExecutor`` while
+    the next ones are read. At most ``2 * workers`` chunks are in flight, and
+    results keep the file's row order.
+    """
+    results = []
+    chunks = iter_user_chunks(filepath, chunksize)
+    if workers <= 1:
+        for chunk in chunks:
+            results.extend(process_users(chunk, config))
+        return results
 
-def calculate_user_score(purchases: str, visits: str, config: ScoringConfig = None) -> int:
-    raise NotImplementedError(f"calculate_user_score called")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(process_users, chunk, config))
+            if len(pending) >= 2 * workers:
+                results.extend(pending.popleft().result())
+        while pending:
+            results.extend(pending.popleft().result())
+    return results
+
+
+def main():
+    users = process_users_from_csv()
+    generate_report(users)
+    export_json(users)
+    print('Done!')
+
+
+if __name__ == '__main__':
+    main()